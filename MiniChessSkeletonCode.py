@@ -1,8 +1,231 @@
+import itertools
 import math
-import copy
+import random
 import time
 import argparse
 
+# Piece type codes; a black piece is its type code offset by BLACK, so
+# piece % 6 recovers the type and piece < BLACK tests for white.
+PAWN, KNIGHT, BISHOP, QUEEN, KING = 1, 2, 3, 4, 5
+BLACK = 6
+EMPTY = 0
+W_P, W_N, W_B, W_Q, W_K = PAWN, KNIGHT, BISHOP, QUEEN, KING
+B_P, B_N, B_B, B_Q, B_K = PAWN + BLACK, KNIGHT + BLACK, BISHOP + BLACK, QUEEN + BLACK, KING + BLACK
+
+PIECE_CODES = {
+    '.': EMPTY,
+    'wp': W_P, 'wN': W_N, 'wB': W_B, 'wQ': W_Q, 'wK': W_K,
+    'bp': B_P, 'bN': B_N, 'bB': B_B, 'bQ': B_Q, 'bK': B_K,
+}
+PIECE_STRINGS = {code: string for string, code in PIECE_CODES.items()}
+PIECE_VALUES = (0, 1, 3, 3, 9, 999, 0, 1, 3, 3, 9, 999)
+WHITE_PIECES = (W_P, W_N, W_B, W_Q, W_K)
+BLACK_PIECES = (B_P, B_N, B_B, B_Q, B_K)
+
+# (row, col) for each of the 25 flat square indices (square = row * 5 + col)
+SQ_COORD = tuple(divmod(square, 5) for square in range(25))
+ALL_SQUARES = (1 << 25) - 1
+
+def _build_leaper_attacks(directions):
+    attacks = []
+    for square in range(25):
+        row, col = SQ_COORD[square]
+        bitboard = 0
+        for x, y in directions:
+            end_row, end_col = row + x, col + y
+            if -1 < end_row < 5 and -1 < end_col < 5:
+                bitboard |= 1 << (end_row * 5 + end_col)
+        attacks.append(bitboard)
+    return tuple(attacks)
+
+# Attack bitboards per source square for the non-sliding pieces
+KNIGHT_ATTACKS = _build_leaper_attacks(((-1, -2), (-1, 2), (1, -2), (1, 2), (-2, -1), (-2, 1), (2, -1), (2, 1)))
+KING_ATTACKS = _build_leaper_attacks(((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)))
+
+# Pawn push and capture targets per source square and color; a push mask is
+# empty on the last rank (where a pawn cannot stand anyway)
+WHITE_PAWN_PUSH = _build_leaper_attacks(((-1, 0),))
+BLACK_PAWN_PUSH = _build_leaper_attacks(((1, 0),))
+WHITE_PAWN_CAPS = _build_leaper_attacks(((-1, -1), (-1, 1)))
+BLACK_PAWN_CAPS = _build_leaper_attacks(((1, -1), (1, 1)))
+
+def _build_slider_attacks(directions):
+    # For each square, enumerate every occupancy of the squares its rays
+    # cross and store the resulting attack set, so slider generation is a
+    # masked table lookup instead of a ray walk. On a 5x5 board a square's
+    # rays cover at most 8 squares, so each table has at most 256 entries.
+    masks = []
+    attacks = []
+    for square in range(25):
+        row, col = SQ_COORD[square]
+        ray_squares = []
+        for x, y in directions:
+            end_row, end_col = row + x, col + y
+            while -1 < end_row < 5 and -1 < end_col < 5:
+                ray_squares.append(end_row * 5 + end_col)
+                end_row += x
+                end_col += y
+        masks.append(sum(1 << s for s in ray_squares))
+        table = {}
+        for subset in range(1 << len(ray_squares)):
+            occupancy = sum(1 << s for i, s in enumerate(ray_squares) if (subset >> i) & 1)
+            bitboard = 0
+            for x, y in directions:
+                end_row, end_col = row + x, col + y
+                while -1 < end_row < 5 and -1 < end_col < 5:
+                    blocker = end_row * 5 + end_col
+                    bitboard |= 1 << blocker
+                    if (occupancy >> blocker) & 1:
+                        break
+                    end_row += x
+                    end_col += y
+            table[occupancy] = bitboard
+        attacks.append(table)
+    return tuple(masks), tuple(attacks)
+
+# Attack tables for the sliders, keyed by square and masked occupancy; the
+# queen combines the bishop (diagonal) and rook (orthogonal) tables
+BISHOP_MASKS, BISHOP_ATTACKS = _build_slider_attacks(((-1, -1), (-1, 1), (1, -1), (1, 1)))
+ROOK_MASKS, ROOK_ATTACKS = _build_slider_attacks(((-1, 0), (0, -1), (0, 1), (1, 0)))
+
+# Zobrist keys: one random 64-bit int per (piece, square) plus one for the
+# side to move, seeded so hashes are reproducible between runs
+_zobrist_rng = random.Random(0x5A5A5A)
+ZOBRIST_PIECE = tuple(tuple(_zobrist_rng.getrandbits(64) for _ in range(25)) for _ in range(12))
+ZOBRIST_TURN = _zobrist_rng.getrandbits(64)
+
+# Bound flags for transposition table entries
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+# Board display template, filled with the 25 piece strings in one format
+# call; %3s right-justifies each piece the way the old per-row join did
+BOARD_TEMPLATE = (''.join(f"{5 - row}  " + ' '.join(['%3s'] * 5) + '\n' for row in range(5)) +
+                  '\n     A   B   C   D   E')
+
+# Input parsing tables: file letter (either case) to column, rank digit to row
+FILE_TO_COL = {letter: col for col, letter in enumerate('ABCDE')}
+FILE_TO_COL.update({letter: col for col, letter in enumerate('abcde')})
+RANK_TO_ROW = {digit: 5 - int(digit) for digit in '12345'}
+
+"""
+Generate the moves for the side to move, captures or quiets. A free function
+taking the state components directly, so every name in the hot loop is a
+local or module global rather than a method or dictionary lookup
+
+Args:
+    - bitboards:    list | the per-piece bitboards from the game state
+    - enemy_occ:    int | occupancy bitboard of the opponent's pieces
+    - all_occ:      int | occupancy bitboard of all pieces
+    - turn_is_white: bool | whether white is the side to move
+    - captures:     bool | generate only captures if True, only quiets if False
+Returns:
+    - generator over the moves ((start_row, start_col), (end_row, end_col))
+"""
+def gen_moves(bitboards, enemy_occ, all_occ, turn_is_white, captures,
+              SQ_COORD=SQ_COORD, KNIGHT_ATTACKS=KNIGHT_ATTACKS, KING_ATTACKS=KING_ATTACKS,
+              BISHOP_MASKS=BISHOP_MASKS, BISHOP_ATTACKS=BISHOP_ATTACKS,
+              ROOK_MASKS=ROOK_MASKS, ROOK_ATTACKS=ROOK_ATTACKS):
+    # The trailing defaults bind the precomputed tables into the function's
+    # locals at definition time, so the loops below read them with LOAD_FAST
+    # instead of a global lookup per access; callers never pass them
+    if turn_is_white:
+        pawns, knights, bishops, queens, kings = (bitboards[W_P], bitboards[W_N], bitboards[W_B],
+                                                  bitboards[W_Q], bitboards[W_K])
+        push_targets, capture_targets = WHITE_PAWN_PUSH, WHITE_PAWN_CAPS
+    else:
+        pawns, knights, bishops, queens, kings = (bitboards[B_P], bitboards[B_N], bitboards[B_B],
+                                                  bitboards[B_Q], bitboards[B_K])
+        push_targets, capture_targets = BLACK_PAWN_PUSH, BLACK_PAWN_CAPS
+    target_mask = enemy_occ if captures else ~all_occ
+    # Pawns: captures come from the diagonal masks, quiets from the push mask
+    pieces = pawns
+    while pieces:
+        lsb = pieces & -pieces
+        square = lsb.bit_length() - 1
+        pieces ^= lsb
+        start = SQ_COORD[square]
+        if captures:
+            attacks = capture_targets[square] & enemy_occ
+            while attacks:
+                attack_lsb = attacks & -attacks
+                yield (start, SQ_COORD[attack_lsb.bit_length() - 1])
+                attacks ^= attack_lsb
+        else:
+            push = push_targets[square] & ~all_occ
+            if push:
+                yield (start, SQ_COORD[push.bit_length() - 1])
+    # Knights and kings from the leaper tables
+    for pieces, attack_table in ((knights, KNIGHT_ATTACKS), (kings, KING_ATTACKS)):
+        while pieces:
+            lsb = pieces & -pieces
+            square = lsb.bit_length() - 1
+            pieces ^= lsb
+            start = SQ_COORD[square]
+            attacks = attack_table[square] & target_mask
+            while attacks:
+                attack_lsb = attacks & -attacks
+                yield (start, SQ_COORD[attack_lsb.bit_length() - 1])
+                attacks ^= attack_lsb
+    # Bishops and queens from the slider tables
+    pieces = bishops | queens
+    while pieces:
+        lsb = pieces & -pieces
+        square = lsb.bit_length() - 1
+        pieces ^= lsb
+        start = SQ_COORD[square]
+        attacks = BISHOP_ATTACKS[square][all_occ & BISHOP_MASKS[square]]
+        if lsb & queens:
+            attacks |= ROOK_ATTACKS[square][all_occ & ROOK_MASKS[square]]
+        attacks &= target_mask
+        while attacks:
+            attack_lsb = attacks & -attacks
+            yield (start, SQ_COORD[attack_lsb.bit_length() - 1])
+            attacks ^= attack_lsb
+
+class TimeoutReached(Exception):
+    """Raised inside the search when the move time budget is exhausted."""
+
+class GameState:
+    """The full game position: the board, the per-piece bitboards and
+    occupancy masks, the zobrist hash and the turn bookkeeping. A slotted
+    class instead of a dictionary, so every attribute access is an indexed
+    load instead of a string hash and probe."""
+    __slots__ = ('board', 'bb', 'white_occ', 'black_occ', 'all_occ', 'zobrist',
+                 'turn', 'game_over_reason', 'turn_number', 'turns_without_capture',
+                 'turn_no_capture')
+
+    def clone(self):
+        # Field-by-field copy: the board and bitboard containers are
+        # duplicated, everything else is immutable. Much cheaper than
+        # copy.deepcopy, which walks the object graph with a memo dict
+        snapshot = GameState()
+        snapshot.board = self.board[:]
+        snapshot.bb = self.bb[:]
+        snapshot.white_occ = self.white_occ
+        snapshot.black_occ = self.black_occ
+        snapshot.all_occ = self.all_occ
+        snapshot.zobrist = self.zobrist
+        snapshot.turn = self.turn
+        snapshot.game_over_reason = self.game_over_reason
+        snapshot.turn_number = self.turn_number
+        snapshot.turns_without_capture = self.turns_without_capture
+        snapshot.turn_no_capture = self.turn_no_capture
+        return snapshot
+
+    def restore(self, snapshot):
+        # Copy every field back from a snapshot of this position
+        self.board[:] = snapshot.board
+        self.bb[:] = snapshot.bb
+        self.white_occ = snapshot.white_occ
+        self.black_occ = snapshot.black_occ
+        self.all_occ = snapshot.all_occ
+        self.zobrist = snapshot.zobrist
+        self.turn = snapshot.turn
+        self.game_over_reason = snapshot.game_over_reason
+        self.turn_number = snapshot.turn_number
+        self.turns_without_capture = snapshot.turns_without_capture
+        self.turn_no_capture = snapshot.turn_no_capture
+
 class MiniChess:
     
     def __init__(self):
@@ -18,6 +241,10 @@ class MiniChess:
         (self.states_visited_per_depth,
          self.non_leaf_nodes,
          self.total_nodes) = self.set_stats()
+        self.transposition_table = {}
+        # Heuristic values keyed by Zobrist hash; the heuristics only depend
+        # on the board and side to move, so entries stay valid for the whole game
+        self.evaluation_cache = {}
 
     """
     Initialize the board
@@ -28,76 +255,79 @@ class MiniChess:
         - state: A dictionary representing the state of the game
     """
     def init_board(self):
-        state = {
-                "board": 
-                [['bK', 'bQ', 'bB', 'bN', '.'],
-                ['.', '.', 'bp', 'bp', '.'],
-                ['.', '.', '.', '.', '.'],
-                ['.', 'wp', 'wp', '.', '.'],
-                ['.', 'wN', 'wB', 'wQ', 'wK']],
-                "turn": 'white',
-                "game_over_reason": '',
-                "turn_number": 1,
-                "turns_without_capture": 0,
-                "turn_no_capture": False
-                }
+        layout = [['bK', 'bQ', 'bB', 'bN', '.'],
+                  ['.', '.', 'bp', 'bp', '.'],
+                  ['.', '.', '.', '.', '.'],
+                  ['.', 'wp', 'wp', '.', '.'],
+                  ['.', 'wN', 'wB', 'wQ', 'wK']]
+        board = bytearray(PIECE_CODES[piece] for row in layout for piece in row)
+        bitboards = [0] * 12
+        for square, piece in enumerate(board):
+            if piece:
+                bitboards[piece] |= 1 << square
+        white_occ = bitboards[W_P] | bitboards[W_N] | bitboards[W_B] | bitboards[W_Q] | bitboards[W_K]
+        black_occ = bitboards[B_P] | bitboards[B_N] | bitboards[B_B] | bitboards[B_Q] | bitboards[B_K]
+        zobrist = 0
+        for square, piece in enumerate(board):
+            if piece:
+                zobrist ^= ZOBRIST_PIECE[piece][square]
+        state = GameState()
+        state.board = board
+        state.bb = bitboards
+        state.zobrist = zobrist
+        state.white_occ = white_occ
+        state.black_occ = black_occ
+        state.all_occ = white_occ | black_occ
+        state.turn = 'white'
+        state.game_over_reason = ''
+        state.turn_number = 1
+        state.turns_without_capture = 0
+        state.turn_no_capture = False
         return state
 
     """
     Prints the board
     
     Args:
-        - game_state: Dictionary representing the current game state
+        - game_state: GameState | the current game state
     Returns:
         - None
     """
     def display_board(self, game_state):
         print()
-        for i, row in enumerate(game_state["board"], start=1):
-            print(str(6-i) + "  " + ' '.join(piece.rjust(3) for piece in row))
-        print()
-        print("     A   B   C   D   E")
+        print(MiniChess.get_formatted_board(game_state))
         print()
 
     @staticmethod
     def get_formatted_board(game_state):
-        board_substrings = []
-        for i, row in enumerate(game_state["board"], start=1):
-            board_substrings.append(str(6-i) + "  " + ' '.join(piece.rjust(3) for piece in row) + '\n')
-        board_substrings.append('\n')
-        board_substrings.append('     A   B   C   D   E')
-        return ''.join(board_substrings)
+        return BOARD_TEMPLATE % tuple(PIECE_STRINGS[piece] for piece in game_state.board)
 
     """
     Check if the move is valid    
     
     Args: 
-        - game_state:   dictionary | Dictionary representing the current game state
+        - game_state:   GameState | the current game state
         - move          tuple | the move which we check the validity of ((start_row, start_col),(end_row, end_col))
     Returns:
         - boolean representing the validity of the move
     """
     def is_valid_move(self, game_state, move):
-        # Check if move is in list of valid moves
-        return move in self.valid_moves(game_state)
-
-    @staticmethod
-    def is_valid_coordinate(coordinate: tuple[int, int]):
-        indexed_row, indexed_col = coordinate
-        return -1 < indexed_row < 5 and -1 < indexed_col < 5
+        # Test the move against the attack tables directly instead of
+        # generating the full move list and scanning it
+        return MiniChess.move_is_legal(game_state, move)
 
     @staticmethod
     def print_valid_moves(moves, game_state):
         piece_translation = {
-            "p": 'Pawn',
-            "N": 'Knight',
-            "B": 'Bishop',
-            "Q": 'Queen',
-            "K": 'King',
+            PAWN: 'Pawn',
+            KNIGHT: 'Knight',
+            BISHOP: 'Bishop',
+            QUEEN: 'Queen',
+            KING: 'King',
         }
 
         for move in moves:
-            print(f'{piece_translation[game_state["board"][move[0][0]][move[0][1]][1]]} {MiniChess.get_readable_move(move)}')
+            print(f'{piece_translation[game_state.board[move[0][0] * 5 + move[0][1]] % 6]} {MiniChess.get_readable_move(move)}')
 
     @staticmethod
     def get_readable_move(move):
@@ -114,7 +344,7 @@ class MiniChess:
     Returns a list of valid moves
 
     Args:
-        - game_state:   dictionary | Dictionary representing the current game state
+        - game_state:   GameState | the current game state
     Returns:
         - valid moves:   list | A list of nested tuples corresponding to valid moves [((start_row, start_col),(end_row, end_col)),((start_row, start_col),(end_row, end_col))]
     """
@@ -122,114 +352,224 @@ class MiniChess:
         # Return a list of all the valid moves.
         # Implement basic move validation
         # Check for out-of-bounds, correct turn, move legality, etc
-        moves = []
-        for row_index, row in enumerate(game_state["board"]):
-            for col_index, piece in enumerate(row):
-                if piece[0] == game_state["turn"][0]:
-                    if piece[1] == 'p':
-                        # Can we go forward
-                        end_row = row_index - 1 if game_state["turn"] == 'white' else row_index + 1
-                        if (MiniChess.is_valid_coordinate((end_row, col_index)) and
-                            game_state["board"][end_row][col_index] == '.'):
-                            moves.append(((row_index, col_index), (end_row, col_index)))
-                        # Can we capture diagonally
-                        for column_direction in [-1, 1]:
-                            diagonal_column = col_index + column_direction
-                            if (MiniChess.is_valid_coordinate((end_row, diagonal_column)) and
-                                game_state["board"][end_row][diagonal_column] != '.' and
-                                game_state["board"][end_row][diagonal_column][0] != game_state["turn"][0]):
-                                moves.append(((row_index, col_index), (end_row, diagonal_column)))
-                    elif piece[1] == 'N':
-                        directions = ((-1, -2), (-1, 2), (1, -2), (1, 2), (-2, -1), (-2, 1), (2, -1), (2, 1))
-                        end_positions = [
-                            (row_index + x, col_index + y) for x, y in directions
-                            if MiniChess.is_valid_coordinate((row_index + x, col_index + y)) and
-                            game_state["board"][row_index + x][col_index + y][0] != game_state["turn"][0]
-                            ]
-                        for knight_position in end_positions:
-                            moves.append(((row_index, col_index), knight_position))
-                    elif piece[1] == 'B':
-                        unit_directions = ((-1, -1), (-1, 1), (1, -1), (1, 1))
-                        for direction in unit_directions:
-                            end_row = row_index + direction[0]
-                            end_column = col_index + direction[1]
-                            while (MiniChess.is_valid_coordinate((end_row, end_column)) and
-                                game_state["board"][end_row][end_column][0] != game_state["turn"][0]):
-                                moves.append(((row_index, col_index), (end_row, end_column)))
-                                if game_state["board"][end_row][end_column] != '.':
-                                    break
-                                end_row = end_row + direction[0]
-                                end_column = end_column + direction[1]
-                    elif piece[1] == 'Q':
-                        unit_directions = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
-                        for direction in unit_directions:
-                            end_row = row_index + direction[0]
-                            end_column = col_index + direction[1]
-                            while (MiniChess.is_valid_coordinate((end_row, end_column)) and
-                                   game_state["board"][end_row][end_column][0] != game_state["turn"][0]):
-                                moves.append(((row_index, col_index), (end_row, end_column)))
-                                if game_state["board"][end_row][end_column] != '.':
-                                    break
-                                end_row = end_row + direction[0]
-                                end_column = end_column + direction[1]
-                    elif piece[1] == 'K':
-                        directions = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
-                        end_positions = [
-                            (row_index + x, col_index + y) for x, y in directions
-                            if MiniChess.is_valid_coordinate((row_index + x, col_index + y)) and
-                               game_state["board"][row_index + x][col_index + y][0] != game_state["turn"][0]
-                        ]
-                        for king_position in end_positions:
-                            moves.append(((row_index, col_index), king_position))
+        moves = self.gen_captures(game_state)
+        moves.extend(self.gen_quiets(game_state))
         return moves
 
+    """
+    Generate the capture moves for the side to move, sorted most valuable
+    victim / least valuable attacker first
+
+    Args:
+        - game_state:   GameState | the current game state
+    Returns:
+        - captures:     list | the capture moves, best victim first
+    """
+    def gen_captures(self, game_state):
+        board = game_state.board
+        turn_is_white = game_state.turn == 'white'
+        enemy_occ = game_state.black_occ if turn_is_white else game_state.white_occ
+        captures = list(gen_moves(game_state.bb, enemy_occ, game_state.all_occ, turn_is_white, True))
+        captures.sort(key=lambda move: (PIECE_VALUES[board[move[1][0] * 5 + move[1][1]]] -
+                                        PIECE_VALUES[board[move[0][0] * 5 + move[0][1]]]),
+                      reverse=True)
+        return captures
+
+    """
+    Generate the quiet (non-capture) moves for the side to move, lazily, so
+    a search that cuts off on a capture never pays for them
+
+    Args:
+        - game_state:   GameState | the current game state
+    Returns:
+        - generator over the quiet moves
+    """
+    def gen_quiets(self, game_state):
+        turn_is_white = game_state.turn == 'white'
+        enemy_occ = game_state.black_occ if turn_is_white else game_state.white_occ
+        return gen_moves(game_state.bb, enemy_occ, game_state.all_occ, turn_is_white, False)
+
+    """
+    Check that a move is playable in this position, used to guard moves taken
+    from the transposition table against stale or colliding entries
+
+    Args:
+        - game_state:   GameState | the current game state
+        - move          tuple | the move to check ((start_row, start_col),(end_row, end_col))
+    Returns:
+        - boolean representing whether the side to move can play the move
+    """
+    @staticmethod
+    def move_is_legal(game_state, move):
+        start_square = move[0][0] * 5 + move[0][1]
+        end_square = move[1][0] * 5 + move[1][1]
+        piece = game_state.board[start_square]
+        if not piece:
+            return False
+        turn_is_white = game_state.turn == 'white'
+        if (piece < BLACK) != turn_is_white:
+            return False
+        own_occ = game_state.white_occ if turn_is_white else game_state.black_occ
+        all_occ = game_state.all_occ
+        end_bit = 1 << end_square
+        piece_type = piece % 6
+        if piece_type == PAWN:
+            if turn_is_white:
+                targets = ((WHITE_PAWN_PUSH[start_square] & ~all_occ) |
+                           (WHITE_PAWN_CAPS[start_square] & game_state.black_occ))
+            else:
+                targets = ((BLACK_PAWN_PUSH[start_square] & ~all_occ) |
+                           (BLACK_PAWN_CAPS[start_square] & game_state.white_occ))
+            return bool(end_bit & targets)
+        if piece_type == KNIGHT:
+            attacks = KNIGHT_ATTACKS[start_square]
+        elif piece_type == KING:
+            attacks = KING_ATTACKS[start_square]
+        elif piece_type == BISHOP:
+            attacks = BISHOP_ATTACKS[start_square][all_occ & BISHOP_MASKS[start_square]]
+        else:
+            attacks = (BISHOP_ATTACKS[start_square][all_occ & BISHOP_MASKS[start_square]] |
+                       ROOK_ATTACKS[start_square][all_occ & ROOK_MASKS[start_square]])
+        return bool(end_bit & attacks & ~own_occ)
+
     """
     Modify to board to make a move
 
-    Args: 
-        - game_state:   dictionary | Dictionary representing the current game state
+    Args:
+        - game_state:   GameState | the current game state
         - move          tuple | the move to perform ((start_row, start_col),(end_row, end_col))
     Returns:
-        - game_state:   dictionary | Dictionary representing the modified game state
+        - undo:         tuple | the information unmake_move needs to restore the previous state
     """
     def make_move(self, game_state, move):
         start = move[0]
         end = move[1]
         start_row, start_col = start
         end_row, end_col = end
-        piece = game_state["board"][start_row][start_col]
-        end_piece = game_state["board"][end_row][end_col]
-        game_state["board"][start_row][start_col] = '.'
-        game_state["board"][end_row][end_col] = piece
-        if piece == 'wp' and end_row == 0:
-            game_state["board"][end_row][end_col] = 'wQ'
-        elif piece == 'bp' and end_row == 4:
-            game_state["board"][end_row][end_col] = 'bQ'
-        if piece[0] == 'w':
-            if end_piece == '.':
-                game_state["turn_no_capture"] = True
+        start_square = start_row * 5 + start_col
+        end_square = end_row * 5 + end_col
+        # Bind the hot state entries to locals once; every name below this
+        # point is a LOAD_FAST instead of a dictionary lookup
+        board = game_state.board
+        bitboards = game_state.bb
+        piece = board[start_square]
+        end_piece = board[end_square]
+        undo = (piece,
+                end_piece,
+                game_state.zobrist,
+                game_state.turn,
+                game_state.turn_no_capture,
+                game_state.turns_without_capture,
+                game_state.turn_number,
+                game_state.game_over_reason)
+        board[start_square] = EMPTY
+        board[end_square] = piece
+        end_bit = 1 << end_square
+        move_mask = (1 << start_square) | end_bit
+        bitboards[piece] ^= move_mask
+        zobrist = undo[2] ^ ZOBRIST_PIECE[piece][start_square] ^ ZOBRIST_PIECE[piece][end_square]
+        if end_piece:
+            bitboards[end_piece] ^= end_bit
+            zobrist ^= ZOBRIST_PIECE[end_piece][end_square]
+        if piece == W_P and end_row == 0:
+            board[end_square] = W_Q
+            bitboards[W_P] ^= end_bit
+            bitboards[W_Q] |= end_bit
+            zobrist ^= ZOBRIST_PIECE[W_P][end_square] ^ ZOBRIST_PIECE[W_Q][end_square]
+        elif piece == B_P and end_row == 4:
+            board[end_square] = B_Q
+            bitboards[B_P] ^= end_bit
+            bitboards[B_Q] |= end_bit
+            zobrist ^= ZOBRIST_PIECE[B_P][end_square] ^ ZOBRIST_PIECE[B_Q][end_square]
+        game_state.zobrist = zobrist
+        white_occ = game_state.white_occ
+        black_occ = game_state.black_occ
+        if piece < BLACK:
+            white_occ ^= move_mask
+            if end_piece:
+                black_occ ^= end_bit
+        else:
+            black_occ ^= move_mask
+            if end_piece:
+                white_occ ^= end_bit
+        game_state.white_occ = white_occ
+        game_state.black_occ = black_occ
+        game_state.all_occ = white_occ | black_occ
+        if piece < BLACK:
+            if end_piece == EMPTY:
+                game_state.turn_no_capture = True
             else:
-                game_state["turn_no_capture"] = False
-                game_state["turns_without_capture"] = 0
-        elif piece[0] == 'b':
-            if end_piece != '.':
-                game_state["turn_no_capture"] = False
-                game_state["turns_without_capture"] = 0
+                game_state.turn_no_capture = False
+                game_state.turns_without_capture = 0
+        else:
+            if end_piece != EMPTY:
+                game_state.turn_no_capture = False
+                game_state.turns_without_capture = 0
             else:
-                if game_state["turn_no_capture"]:
-                    game_state["turns_without_capture"] += 1
-        if end_piece in ['bK', 'wK']:
-            game_state["game_over_reason"] = 'king captured'
-            return game_state
-        elif game_state["turn_number"] == self.max_turns and piece[0] == 'b':
-            game_state["game_over_reason"] = 'max turns'
-            return game_state
-        elif game_state["turns_without_capture"] == 10:
-            game_state["game_over_reason"] = 'no captures'
-            return game_state
-        game_state["turn_number"] = game_state["turn_number"] + 1 if piece[0] == 'b' else game_state["turn_number"]
-        game_state["turn"] = "black" if game_state["turn"] == "white" else "white"
-        return game_state
+                if game_state.turn_no_capture:
+                    game_state.turns_without_capture += 1
+        if end_piece % 6 == KING:
+            game_state.game_over_reason = 'king captured'
+            return undo
+        elif game_state.turn_number == self.max_turns and piece >= BLACK:
+            game_state.game_over_reason = 'max turns'
+            return undo
+        elif game_state.turns_without_capture == 10:
+            game_state.game_over_reason = 'no captures'
+            return undo
+        game_state.turn_number = game_state.turn_number + 1 if piece >= BLACK else game_state.turn_number
+        game_state.turn = "black" if game_state.turn == "white" else "white"
+        game_state.zobrist ^= ZOBRIST_TURN
+        return undo
+
+    """
+    Restore the game state to what it was before a move made by make_move
+
+    Args:
+        - game_state:   GameState | the current game state
+        - move          tuple | the move to undo ((start_row, start_col),(end_row, end_col))
+        - undo          tuple | the undo information returned by make_move for that move
+    Returns:
+        - None
+    """
+    def unmake_move(self, game_state, move, undo):
+        (piece, end_piece, prev_zobrist, prev_turn, prev_turn_no_capture,
+         prev_turns_without_capture, prev_turn_number, prev_game_over_reason) = undo
+        start_square = move[0][0] * 5 + move[0][1]
+        end_square = move[1][0] * 5 + move[1][1]
+        end_bit = 1 << end_square
+        move_mask = (1 << start_square) | end_bit
+        board = game_state.board
+        bitboards = game_state.bb
+        if board[end_square] != piece:
+            # The move was a promotion; take the queen off and put the pawn back
+            bitboards[board[end_square]] ^= end_bit
+            bitboards[piece] |= 1 << start_square
+        else:
+            bitboards[piece] ^= move_mask
+        board[start_square] = piece
+        board[end_square] = end_piece
+        if end_piece:
+            bitboards[end_piece] |= end_bit
+        white_occ = game_state.white_occ
+        black_occ = game_state.black_occ
+        if piece < BLACK:
+            white_occ ^= move_mask
+            if end_piece:
+                black_occ |= end_bit
+        else:
+            black_occ ^= move_mask
+            if end_piece:
+                white_occ |= end_bit
+        game_state.white_occ = white_occ
+        game_state.black_occ = black_occ
+        game_state.all_occ = white_occ | black_occ
+        game_state.zobrist = prev_zobrist
+        game_state.turn = prev_turn
+        game_state.turn_no_capture = prev_turn_no_capture
+        game_state.turns_without_capture = prev_turns_without_capture
+        game_state.turn_number = prev_turn_number
+        game_state.game_over_reason = prev_game_over_reason
 
     """
     Parse the input string and modify it into board coordinates
@@ -240,50 +580,221 @@ class MiniChess:
         - (start, end)  tuple | the move to perform ((start_row, start_col),(end_row, end_col))
     """
     def parse_input(self, move):
-        try:
-            start, end = move.split()
-            start = (5-int(start[1]), ord(start[0].upper()) - ord('A'))
-            end = (5-int(end[1]), ord(end[0].upper()) - ord('A'))
-            return (start, end)
-        except:
+        squares = move.split()
+        if len(squares) != 2 or len(squares[0]) != 2 or len(squares[1]) != 2:
+            return None
+        start, end = squares
+        # Table lookups validate and convert in one step; anything not on
+        # the board (wrong letter, digit out of range) misses the tables
+        if (start[0] not in FILE_TO_COL or start[1] not in RANK_TO_ROW or
+                end[0] not in FILE_TO_COL or end[1] not in RANK_TO_ROW):
             return None
+        return ((RANK_TO_ROW[start[1]], FILE_TO_COL[start[0]]),
+                (RANK_TO_ROW[end[1]], FILE_TO_COL[end[0]]))
 
-    def minimax(self, game_state, depth, turn, start_time, is_max=True, alpha=-math.inf, beta=math.inf):
-        self.total_nodes += 1
-        self.states_visited_per_depth[self.depth - depth] += 1
-        if depth == 0 or game_state["game_over_reason"] or (time.time() - start_time >= self.timeout - 0.01):
-            return self.heuristic(game_state, turn), None
-        self.non_leaf_nodes += 1
-        if is_max:
-            maximum = -math.inf
-            potential_moves = self.valid_moves(game_state)
-            best_move = None
-            for move in potential_moves:
-                potential_state = self.make_move(copy.deepcopy(game_state), move)
-                state_value, _ = self.minimax(potential_state, depth - 1, turn, start_time, False, alpha, beta)
-                if state_value > maximum:
-                    maximum = state_value
-                    best_move = move
-                if self.alphabeta:
-                    alpha = max(alpha, state_value)
-                    if beta <= alpha:
-                        break
-            return maximum, best_move
+    """
+    Search with iterative deepening: run negamax at depth 1, 2, ... up to the
+    configured depth, keeping the best move of the last completed iteration.
+    Shallow iterations seed the transposition table, so each deeper search
+    starts with good move ordering, and a timeout mid-iteration still leaves
+    a usable move from the previous depth
+
+    Args:
+        - game_state:   GameState | the current game state
+        - start_time:   float | the time the search started, for the timeout
+    Returns:
+        - (score, move) | the search score and best move for the side to move
+    """
+    def iterative_deepening(self, game_state, start_time):
+        best_score, best_move = None, None
+        snapshot = game_state.clone()
+        # The node counters live in a flat list passed down the recursion, so
+        # the hot loop does one indexed store per node instead of attribute
+        # loads on self; slots 0 and 1 are the totals, the rest is per depth
+        stats = [self.total_nodes, self.non_leaf_nodes] + self.states_visited_per_depth
+        for depth in range(1, self.depth + 1):
+            try:
+                best_score, best_move = self.negamax(game_state, depth, start_time, self.depth - depth, stats)
+            except TimeoutReached:
+                # The interrupted iteration left its moves made on the state
+                game_state.restore(snapshot)
+                break
+            # Not enough time left for a deeper iteration to finish
+            if time.perf_counter() - start_time > self.timeout * 0.5:
+                break
+        self.total_nodes, self.non_leaf_nodes = stats[0], stats[1]
+        self.states_visited_per_depth[:] = stats[2:]
+        if best_move is None:
+            # Timed out before depth 1 finished; fall back to any legal move
+            moves = self.order_moves(game_state, self.valid_moves(game_state), None)
+            best_move = moves[0] if moves else None
+            best_score = self.heuristic(game_state, game_state.turn)
+        return best_score, best_move
+
+    """
+    Negamax with fail-soft alpha-beta: one recursive function scoring every
+    node from the perspective of the side to move, so the maximizing and
+    minimizing cases share a single loop and the child's value is negated.
+    The only child whose value is not negated is a game-over state, where
+    make_move leaves the turn with the mover
+
+    Args:
+        - game_state:   GameState | the current game state
+        - depth:        int | remaining search depth
+        - start_time:   float | the time the search started, for the timeout
+        - ply:          int | distance from the root, indexing the depth stats
+        - stats:        list | the node counters built in iterative_deepening
+        - alpha, beta:  float | the search window, from the side to move's perspective
+    Returns:
+        - (score, move) | the negamax score and best move for the side to move
+    """
+    def negamax(self, game_state, depth, start_time, ply, stats, alpha=-math.inf, beta=math.inf):
+        stats[0] += 1
+        stats[ply + 2] += 1
+        # Checking the clock is comparatively expensive, so only do it once
+        # every 4096 nodes; the exception unwinds to iterative_deepening
+        if (stats[0] & 4095) == 0 and time.perf_counter() - start_time >= self.timeout - 0.01:
+            raise TimeoutReached
+        if game_state.game_over_reason:
+            return self.evaluate(game_state), None
+        if depth == 0:
+            return self.qsearch(game_state, start_time, stats, alpha, beta), None
+        alpha_original, beta_original = alpha, beta
+        tt_key = game_state.zobrist
+        tt_move = None
+        entry = self.transposition_table.get(tt_key)
+        if entry is not None:
+            tt_move = entry[3]
+            if entry[0] >= depth:
+                _, tt_value, tt_flag, _ = entry
+                if tt_flag == TT_EXACT:
+                    return tt_value, tt_move
+                elif tt_flag == TT_LOWER:
+                    alpha = max(alpha, tt_value)
+                else:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_value, tt_move
+        stats[1] += 1
+        turn = game_state.turn
+        best_value = -math.inf
+        best_move = None
+        # Try the table move first, then captures, then quiets; the quiet
+        # generator never runs when an earlier move already cuts off
+        if tt_move is not None and not MiniChess.move_is_legal(game_state, tt_move):
+            tt_move = None
+        move_source = itertools.chain(self.gen_captures(game_state), self.gen_quiets(game_state))
+        if tt_move is not None:
+            move_source = itertools.chain((tt_move,), (move for move in move_source if move != tt_move))
+        for move in move_source:
+            undo = self.make_move(game_state, move)
+            state_value, _ = self.negamax(game_state, depth - 1, start_time, ply + 1, stats, -beta, -alpha)
+            if game_state.turn != turn:
+                state_value = -state_value
+            self.unmake_move(game_state, move, undo)
+            if state_value > best_value:
+                best_value = state_value
+                best_move = move
+            if self.alphabeta:
+                alpha = max(alpha, state_value)
+                if beta <= alpha:
+                    break
+        self.store_transposition(tt_key, depth, best_value, alpha_original, beta_original, best_move)
+        return best_value, best_move
+
+    """
+    Quiescence search: at the nominal search horizon, keep searching capture
+    moves until the position is quiet, so the heuristic is never read in the
+    middle of a capture exchange (the horizon effect). The side to move can
+    always "stand pat" on the current evaluation
+
+    Args:
+        - game_state:   GameState | the current game state
+        - start_time:   float | the time the search started, for the timeout
+        - stats:        list | the node counters built in iterative_deepening
+        - alpha, beta:  float | the search window, from the side to move's perspective
+    Returns:
+        - the quiescence score for the side to move
+    """
+    def qsearch(self, game_state, start_time, stats, alpha=-math.inf, beta=math.inf):
+        stats[0] += 1
+        if (stats[0] & 4095) == 0 and time.perf_counter() - start_time >= self.timeout - 0.01:
+            raise TimeoutReached
+        stand_pat = self.evaluate(game_state)
+        if game_state.game_over_reason:
+            return stand_pat
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        turn = game_state.turn
+        best_value = stand_pat
+        for move in self.gen_captures(game_state):
+            undo = self.make_move(game_state, move)
+            value = self.qsearch(game_state, start_time, stats, -beta, -alpha)
+            if game_state.turn != turn:
+                value = -value
+            self.unmake_move(game_state, move, undo)
+            if value > best_value:
+                best_value = value
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+        return best_value
+
+    """
+    Heuristic evaluation of the position for the side to move, cached by
+    Zobrist hash
+
+    Args:
+        - game_state:   GameState | the current game state
+    Returns:
+        - the heuristic value for the side to move
+    """
+    def evaluate(self, game_state):
+        key = game_state.zobrist
+        value = self.evaluation_cache.get(key)
+        if value is None:
+            value = self.heuristic(game_state, game_state.turn)
+            self.evaluation_cache[key] = value
+        return value
+
+    """
+    Sort moves so the ones most likely to cause a cutoff are searched first:
+    the transposition table move, then captures by most-valuable-victim /
+    least-valuable-attacker, then the quiet moves
+
+    Args:
+        - game_state:   GameState | the current game state
+        - moves:        list | the moves to order, as returned by valid_moves
+        - tt_move:      tuple | the best move stored for this position, or None
+    Returns:
+        - moves:        list | the same list, sorted in place
+    """
+    @staticmethod
+    def order_moves(game_state, moves, tt_move):
+        board = game_state.board
+
+        def move_key(move):
+            if move == tt_move:
+                return 10000
+            victim = board[move[1][0] * 5 + move[1][1]]
+            if victim:
+                return 1000 + PIECE_VALUES[victim] - PIECE_VALUES[board[move[0][0] * 5 + move[0][1]]]
+            return 0
+
+        moves.sort(key=move_key, reverse=True)
+        return moves
+
+    def store_transposition(self, key, depth, value, alpha_original, beta_original, best_move):
+        if value <= alpha_original:
+            flag = TT_UPPER
+        elif value >= beta_original:
+            flag = TT_LOWER
         else:
-            minimum = math.inf
-            potential_moves = self.valid_moves(game_state)
-            best_move = None
-            for move in potential_moves:
-                potential_state = self.make_move(copy.deepcopy(game_state), move)
-                state_value, _ = self.minimax(potential_state, depth - 1, turn, start_time,True, alpha, beta)
-                if state_value < minimum:
-                    minimum = state_value
-                    best_move = move
-                if self.alphabeta:
-                    beta = min(beta, state_value)
-                    if beta <= alpha:
-                        break
-            return minimum, best_move
+            flag = TT_EXACT
+        self.transposition_table[key] = (depth, value, flag, best_move)
 
     """
     Game loop
@@ -301,72 +812,86 @@ class MiniChess:
                 file.write('Invalid amount of turns. Exiting program.')
                 exit(2)
             print("Welcome to Mini Chess! Enter moves as 'B2 B3'. Type 'exit' to quit.")
-            while not self.current_game_state["game_over_reason"]:
-                print(f'\nTurn #{self.current_game_state["turn_number"]}')
-                file.write(f'\nTurn #{self.current_game_state["turn_number"]}\n')
+            while not self.current_game_state.game_over_reason:
+                # Buffer the turn's log lines and write them out in one call
+                log_lines = []
+                print(f'\nTurn #{self.current_game_state.turn_number}')
+                log_lines.append(f'\nTurn #{self.current_game_state.turn_number}\n')
                 board = MiniChess.get_formatted_board(self.current_game_state)
                 print(board)
-                file.write(f'{board}\n')
-                if ((self.current_game_state["turn"] == 'white' and self.white_ai) or
-                    (self.current_game_state["turn"] == 'black' and self.black_ai)):
-                    current_time = time.time()
-                    minimax_score, move = self.minimax(self.current_game_state, self.depth, self.current_game_state["turn"], current_time)
-                    total_time = time.time() - current_time
-                    print(f'Heuristic score: {self.heuristic(self.current_game_state, self.current_game_state["turn"])}')
-                    file.write(f'Heuristic score: {self.heuristic(self.current_game_state, self.current_game_state["turn"])}\n')
-                    print(f"{self.current_game_state["turn"].capitalize()} to move: {MiniChess.get_readable_move(move)}")
-                    file.write(f"{self.current_game_state["turn"].capitalize()} to move: {MiniChess.get_readable_move(move)}\n")
+                log_lines.append(f'{board}\n')
+                if ((self.current_game_state.turn == 'white' and self.white_ai) or
+                    (self.current_game_state.turn == 'black' and self.black_ai)):
+                    # Stored values are relative to the side searching, so the
+                    # table does not carry over from one root search to the next
+                    self.transposition_table.clear()
+                    current_time = time.perf_counter()
+                    minimax_score, move = self.iterative_deepening(self.current_game_state, current_time)
+                    total_time = time.perf_counter() - current_time
+                    heuristic_score = self.heuristic(self.current_game_state, self.current_game_state.turn)
+                    print(f'Heuristic score: {heuristic_score}')
+                    log_lines.append(f'Heuristic score: {heuristic_score}\n')
+                    turn_name = self.current_game_state.turn.capitalize()
+                    print(f'{turn_name} to move: {MiniChess.get_readable_move(move)}')
+                    log_lines.append(f'{turn_name} to move: {MiniChess.get_readable_move(move)}\n')
                     self.make_move(self.current_game_state, move)
                     print(f'Time taken to compute move: {total_time}s')
-                    file.write(f'Time taken to compute move: {total_time}s\n')
+                    log_lines.append(f'Time taken to compute move: {total_time}s\n')
                     print(f'Minimax search score: {minimax_score}')
-                    file.write(f'Minimax search score: {minimax_score}\n')
+                    log_lines.append(f'Minimax search score: {minimax_score}\n')
                     cumulative_states_visited = sum(self.states_visited_per_depth)
                     print(f'Cumulative states explored: {cumulative_states_visited}')
-                    file.write(f'Cumulative states explored: {cumulative_states_visited}\n')
+                    log_lines.append(f'Cumulative states explored: {cumulative_states_visited}\n')
                     print(f'Cumulative states explored per depth: {self.states_visited_per_depth}')
-                    file.write(f'Cumulative states explored per depth: {self.states_visited_per_depth}\n')
+                    log_lines.append(f'Cumulative states explored per depth: {self.states_visited_per_depth}\n')
                     print(f'Cumulative % states explored per depth: {[a / cumulative_states_visited for a in self.states_visited_per_depth]}')
-                    file.write(f'Cumulative % states explored per depth: {[a / cumulative_states_visited for a in self.states_visited_per_depth]}\n')
+                    log_lines.append(f'Cumulative % states explored per depth: {[a / cumulative_states_visited for a in self.states_visited_per_depth]}\n')
                     print(f'Branching factor: {(self.total_nodes - 1) / self.non_leaf_nodes}')
                     self.total_nodes = self.non_leaf_nodes = 0
                 else:
-                    move = input(f"{self.current_game_state['turn'].capitalize()} to move: ")
-                    file.write(f"{self.current_game_state['turn'].capitalize()} to move: {move}\n")
+                    move = input(f"{self.current_game_state.turn.capitalize()} to move: ")
+                    log_lines.append(f"{self.current_game_state.turn.capitalize()} to move: {move}\n")
                     if move.lower() == 'exit':
                         print("\nGame exited.")
-                        file.write('\nGame exited.')
+                        log_lines.append('\nGame exited.')
+                        file.write(''.join(log_lines))
                         exit(1)
                     move = self.parse_input(move)
                     if not move or not self.is_valid_move(self.current_game_state, move):
                         print("Invalid move. Try again.")
-                        file.write('Invalid move. Try again.\n')
+                        log_lines.append('Invalid move. Try again.\n')
+                        file.write(''.join(log_lines))
                         continue
                     self.make_move(self.current_game_state, move)
+                file.write(''.join(log_lines))
 
             # If we reach here, the game is over
+            log_lines = []
             board = MiniChess.get_formatted_board(self.current_game_state)
             print()
             print(board)
-            file.write('\n')
-            file.write(board)
-            if self.current_game_state["game_over_reason"] == 'king captured':
-                print(f"\n{self.current_game_state['turn'].capitalize()} WINS in {self.current_game_state["turn_number"]} turns!")
-                file.write(f"\n{self.current_game_state['turn'].capitalize()} WINS in {self.current_game_state["turn_number"]} turns!")
-            elif self.current_game_state["game_over_reason"] == 'max turns':
+            log_lines.append('\n')
+            log_lines.append(board)
+            if self.current_game_state.game_over_reason == 'king captured':
+                winner = self.current_game_state.turn.capitalize()
+                print(f'\n{winner} WINS in {self.current_game_state.turn_number} turns!')
+                log_lines.append(f'\n{winner} WINS in {self.current_game_state.turn_number} turns!')
+            elif self.current_game_state.game_over_reason == 'max turns':
                 print('\nMaximum amount of turns reached, DRAW')
-                file.write('\nMaximum amount of turns reached, DRAW')
+                log_lines.append('\nMaximum amount of turns reached, DRAW')
             else:
                 print('\nThere has been no captures in 10 turns, DRAW')
-                file.write('\nThere has been no captures in 10 turns, DRAW')
-                
+                log_lines.append('\nThere has been no captures in 10 turns, DRAW')
+            file.write(''.join(log_lines))
+
     def log_parameters(self, file):
-        file.write(f'Max turns: {self.max_turns}\n')
-        file.write(f'{'Human' if not self.white_ai else 'AI'} vs. {'Human' if not self.black_ai else 'AI'}\n')
+        lines = [f'Max turns: {self.max_turns}\n',
+                 f"{'Human' if not self.white_ai else 'AI'} vs. {'Human' if not self.black_ai else 'AI'}\n"]
         if self.white_ai or self.black_ai:
-            file.write(f'alphabeta: {'enabled' if self.alphabeta else 'disabled'}\n')
-            file.write(f'Heuristic: {self.heuristic.__name__}\n')
-            file.write(f'Timeout: {self.timeout}s\n')
+            lines.append(f"alphabeta: {'enabled' if self.alphabeta else 'disabled'}\n")
+            lines.append(f'Heuristic: {self.heuristic.__name__}\n')
+            lines.append(f'Timeout: {self.timeout}s\n')
+        file.write(''.join(lines))
 
     def set_parameters(self):
         max_turns = int(input('Enter the maximum amount of turns: '))
@@ -392,71 +917,55 @@ class MiniChess:
         return states_visited_per_depth, non_leaf_nodes, total_nodes
 
     def king_safety_score(self, game_state, turn):
-        king_coordinate = None
-        for row_index, row in enumerate(game_state["board"]):
-            for col_index, piece in enumerate(row):
-                if piece == f'{turn[0]}K':
-                    king_coordinate = (row_index, col_index)
-        if king_coordinate is None:
+        king_code = W_K if turn == 'white' else B_K
+        king_bitboard = game_state.bb[king_code]
+        if not king_bitboard:
             return -999
-        if game_state["turn"] != turn:
-            valid_moves = self.valid_moves(game_state)
-            for _, end_pos in valid_moves:
+        king_coordinate = SQ_COORD[king_bitboard.bit_length() - 1]
+        if game_state.turn != turn:
+            # Only a capture can land on the king's square
+            for _, end_pos in self.gen_captures(game_state):
                 if king_coordinate == end_pos:
                     return -999
+        king_row = king_coordinate[0]
         if turn == 'white':
-            forward_row = king_coordinate[0] - 1
-            forward_pieces = 0
-            for row in range(forward_row, -1, -1):
-                for piece in game_state["board"][row]:
-                    if piece[0] == 'w':
-                        forward_pieces += 1
-            return 4 * forward_pieces - 10
+            # White moves up the board, so forward rows are the ones above the king
+            forward_mask = (1 << (5 * king_row)) - 1
+            forward_pieces = (game_state.white_occ & forward_mask).bit_count()
         else:
-            forward_row = king_coordinate[0] + 1
-            forward_pieces = 0
-            for row in range(forward_row, 5, 1):
-                for piece in game_state["board"][row]:
-                    if piece[0] == 'b':
-                        forward_pieces += 1
-            return 4 * forward_pieces - 10
+            forward_mask = ALL_SQUARES ^ ((1 << (5 * (king_row + 1))) - 1)
+            forward_pieces = (game_state.black_occ & forward_mask).bit_count()
+        return 4 * forward_pieces - 10
 
     @staticmethod
     def material_score(game_state):
-        white_score, black_score = 0, 0
-        piece_values = {
-            "p": 1,
-            "B": 3,
-            "N": 3,
-            "Q": 9,
-            "K": 999
-        }
-        for row in game_state["board"]:
-            for piece in row:
-                if piece[0] == 'w':
-                    white_score += piece_values[piece[1]]
-                elif piece[0] == 'b':
-                    black_score += piece_values[piece[1]]
+        bitboards = game_state.bb
+        white_score = sum(PIECE_VALUES[piece] * bitboards[piece].bit_count() for piece in WHITE_PIECES)
+        black_score = sum(PIECE_VALUES[piece] * bitboards[piece].bit_count() for piece in BLACK_PIECES)
         return white_score - black_score
 
     def select_heuristic(self, heuristic_input):
-        def e0(game_state, _):
-            return MiniChess.material_score(game_state)
+        def e0(game_state, turn):
+            # Scored from the given side's perspective so negamax can negate it
+            material_score = MiniChess.material_score(game_state)
+            return material_score if turn == 'white' else -material_score
 
         def e1(game_state, turn):
             score = 0
             score += self.king_safety_score(game_state, turn)
-            material_score = MiniChess.material_score(game_state) if turn == 'white' else -MiniChess.material_score(game_state)
-            score += material_score
+            material_score = MiniChess.material_score(game_state)
+            score += material_score if turn == 'white' else -material_score
             return score
 
         def e2(game_state, turn):
+            board = game_state.board
             w_center_pieces, b_center_pieces = 0, 0
             for i in range(1, 4, 1):
                 for j in range(1, 4, 1):
-                    if game_state["board"][i][j][0] == 'w':
+                    piece = board[i * 5 + j]
+                    if piece and piece < BLACK:
                         w_center_pieces += 1
-                    elif game_state["board"][i][j][0] == 'b':
+                    elif piece >= BLACK:
                         b_center_pieces += 1
             return w_center_pieces - b_center_pieces if turn == 'white' else b_center_pieces - w_center_pieces
 